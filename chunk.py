@@ -1,6 +1,10 @@
 """Text chunking: token-based (tiktoken) with char fallback."""
 
-from typing import List
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 try:
     import tiktoken  # optional
@@ -8,6 +12,62 @@ except Exception:
     tiktoken = None
 
 
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> "tiktoken.Encoding":
+    """Resolve the tiktoken encoding for a model once per process (BPE load is slow)."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=8)
+def _token_char_table(model: str) -> np.ndarray:
+    """
+    Per-encoding table: token id -> number of characters that start inside the token.
+    Counts UTF-8 lead bytes so multi-byte chars split across tokens map cleanly.
+    """
+    enc = _get_encoding(model)
+    pieces: List[bytes] = []
+    for tok in range(enc.n_vocab):
+        try:
+            pieces.append(enc.decode_single_token_bytes(tok))
+        except KeyError:
+            pieces.append(b"")  # unused id (gap before special tokens)
+    lengths = np.fromiter(map(len, pieces), dtype=np.int64, count=len(pieces))
+    data = np.frombuffer(b"".join(pieces), dtype=np.uint8)
+    is_lead = ((data & 0xC0) != 0x80).astype(np.int64)
+    # Sum lead bytes per token: cumulative count at each token's end minus at its start
+    ends = np.cumsum(lengths)
+    cum = np.concatenate(([0], np.cumsum(is_lead)))
+    table = cum[ends] - cum[ends - lengths]
+    table.setflags(write=False)
+    return table
+
+
+def _token_char_offsets(toks: List[int], model: str) -> np.ndarray:
+    """Cumulative char offsets: offsets[i] is where token i starts in the original text."""
+    offsets = np.zeros(len(toks) + 1, dtype=np.int64)
+    np.cumsum(_token_char_table(model)[np.asarray(toks, dtype=np.int64)], out=offsets[1:])
+    return offsets
+
+
+def token_windows(
+    toks: List[int],
+    chunk_tokens: int,
+    overlap_tokens: int,
+) -> List[Tuple[int, int]]:
+    """(start, end) token index windows with overlap."""
+    windows: List[Tuple[int, int]] = []
+    step = max(1, chunk_tokens - overlap_tokens)
+    for start in range(0, len(toks), step):
+        end = min(len(toks), start + chunk_tokens)
+        windows.append((start, end))
+        if end >= len(toks):
+            break
+    return windows
+
+
 def chunk_text_tokens(
     text: str,
     chunk_tokens: int,
@@ -22,24 +82,55 @@ def chunk_text_tokens(
     if tiktoken is None:
         return chunk_text_chars(text, chunk_chars=chunk_chars, overlap_chars=overlap_chars)
 
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except Exception:
-        enc = tiktoken.get_encoding("cl100k_base")
+    toks = _get_encoding(model).encode_ordinary(text)
+    return chunks_from_tokens(text, toks, chunk_tokens, overlap_tokens, model)
 
-    toks = enc.encode(text)
+
+def chunk_texts_tokens(
+    texts: List[str],
+    chunk_tokens: int,
+    overlap_tokens: int,
+    model: str,
+    chunk_chars: int = 5000,
+    overlap_chars: int = 800,
+    num_threads: Optional[int] = None,
+) -> List[List[str]]:
+    """
+    Batch version of chunk_text_tokens: tokenizes all texts in one
+    encode_ordinary_batch call (Rust thread pool, GIL released), then windows each.
+    """
+    if tiktoken is None:
+        return [
+            chunk_text_chars(t, chunk_chars=chunk_chars, overlap_chars=overlap_chars)
+            for t in texts
+        ]
+
+    enc = _get_encoding(model)
+    token_lists = enc.encode_ordinary_batch(texts, num_threads=num_threads or os.cpu_count() or 1)
+    return [
+        chunks_from_tokens(text, toks, chunk_tokens, overlap_tokens, model)
+        for text, toks in zip(texts, token_lists)
+    ]
+
+
+def chunks_from_tokens(
+    text: str,
+    toks: List[int],
+    chunk_tokens: int,
+    overlap_tokens: int,
+    model: str,
+) -> List[str]:
+    """Window already-encoded tokens and slice the matching spans out of text."""
     if not toks:
         return []
 
+    # Slice the original text by char offsets instead of decoding every window
+    offsets = _token_char_offsets(toks, model)
     chunks: List[str] = []
-    step = max(1, chunk_tokens - overlap_tokens)
-    for start in range(0, len(toks), step):
-        end = min(len(toks), start + chunk_tokens)
-        chunk = enc.decode(toks[start:end]).strip()
+    for start, end in token_windows(toks, chunk_tokens, overlap_tokens):
+        chunk = text[offsets[start]:offsets[end]].strip()
         if chunk:
             chunks.append(chunk)
-        if end >= len(toks):
-            break
     return chunks
 
 
@@ -34,6 +34,10 @@ def _env_int(key: str, default: str) -> int:
     return int(os.environ.get(key, default))
 
 
+def _env_bool(key: str, default: str) -> bool:
+    return os.environ.get(key, default).strip().lower() in ("1", "true", "yes")
+
+
 @dataclass
 class Settings:
     mongodb_uri: str = field(default_factory=lambda: _env("MONGODB_URI", ""))
@@ -42,6 +46,8 @@ class Settings:
 
     openai_api_key: str = field(default_factory=lambda: _env("OPENAI_API_KEY", ""))
     embed_model: str = field(default_factory=lambda: _env("OPENAI_EMBED_MODEL", "text-embedding-3-small"))
+    # Store embeddings as packed float32 BSON binary vectors instead of arrays of doubles
+    embed_binary: bool = field(default_factory=lambda: _env_bool("EMBED_BINARY", "0"))
 
     # Chunking (token-based preferred, char-based fallback)
     chunk_tokens: int = field(default_factory=lambda: _env_int("CHUNK_TOKENS", "1000"))
@@ -49,5 +55,19 @@ class Settings:
     chunk_chars: int = field(default_factory=lambda: _env_int("CHUNK_CHARS", "5000"))
     overlap_chars: int = field(default_factory=lambda: _env_int("OVERLAP_CHARS", "800"))
 
+    # Ingest (processes used to normalize files; 1 = inline)
+    ingest_workers: int = field(default_factory=lambda: _env_int("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    # Threads for stat/hash of candidate files (I/O-bound; releases the GIL)
+    io_workers: int = field(default_factory=lambda: _env_int("IO_WORKERS", "32"))
+    # Use JSON files' raw text as-is (trusted sources already written with sorted keys + indent 2)
+    json_trust_canonical: bool = field(default_factory=lambda: _env_bool("JSON_TRUST_CANONICAL", "0"))
+
+    # Ingest (ops per MongoDB bulk_write call)
+    mongo_batch_size: int = field(default_factory=lambda: _env_int("MONGO_BATCH_SIZE", "1000"))
+
     # Ingest (batch size for embeddings API)
     batch_size: int = field(default_factory=lambda: _env_int("BATCH_SIZE", "64"))
+    # Embedding batches in flight at once (1 = sequential sync client)
+    embed_concurrency: int = field(default_factory=lambda: _env_int("EMBED_CONCURRENCY", "8"))
+    # Local embedding cache keyed by (model, sha256(chunk)); empty string disables
+    embed_cache_path: str = field(default_factory=lambda: _env("EMBED_CACHE_PATH", ".cache/embeddings.sqlite"))
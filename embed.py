@@ -1,6 +1,16 @@
+import asyncio
+import io
+import json
+import os
+import sqlite3
 import time
-from typing import List
-from openai import OpenAI, RateLimitError, APIError
+from array import array
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from openai import AsyncOpenAI, OpenAI, RateLimitError, APIError
+
+from utils import sha256_text
+
+T = TypeVar("T")
 
 # ----------------------------
 # Embeddings
@@ -31,4 +41,229 @@ def embed_texts_openai(
             # For other errors, don't retry
             raise
     
-    raise RuntimeError("Failed to embed texts after retries")
\ No newline at end of file
+    raise RuntimeError("Failed to embed texts after retries")
+
+
+async def embed_texts_openai_async(
+    client: AsyncOpenAI,
+    model: str,
+    texts: List[str],
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+) -> List[List[float]]:
+    """
+    Async variant of embed_texts_openai with the same backoff behaviour.
+    """
+    for attempt in range(max_retries):
+        try:
+            resp = await client.embeddings.create(model=model, input=texts)
+            return [d.embedding for d in resp.data]
+        except (RateLimitError, APIError) as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = base_delay * (2 ** attempt)
+            print(f"Embedding API error (attempt {attempt + 1}/{max_retries}): {e}. Retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+    raise RuntimeError("Failed to embed texts after retries")
+
+
+async def gather_with_concurrency(n: int, coros: List[Awaitable[T]]) -> List[T]:
+    """asyncio.gather with at most n coroutines in flight; results keep input order."""
+    sem = asyncio.Semaphore(n)
+
+    async def _run(coro: Awaitable[T]) -> T:
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(_run(c) for c in coros))
+
+
+class AsyncBatchEmbedder:
+    """
+    Embeds several batches concurrently (IO-bound HTTPS round-trips overlap) through
+    one AsyncOpenAI client on one event loop, kept for a whole ingest run so its
+    connection pool and TLS sessions are reused from call to call.
+    """
+
+    def __init__(self, api_key: str, model: str, concurrency: int = 8):
+        self.model = model
+        self.concurrency = concurrency
+        self._runner = asyncio.Runner()
+        self._client = self._runner.run(self._open(api_key))
+
+    @staticmethod
+    async def _open(api_key: str) -> AsyncOpenAI:
+        # Created inside the runner's loop, which owns its connections
+        return AsyncOpenAI(api_key=api_key)
+
+    def embed_batches(self, batches: List[List[str]]) -> List[List[List[float]]]:
+        """Returns one embeddings list per input batch, in input order."""
+        return self._runner.run(
+            gather_with_concurrency(
+                self.concurrency,
+                [embed_texts_openai_async(self._client, self.model, b) for b in batches],
+            )
+        )
+
+    def close(self) -> None:
+        self._runner.run(self._client.close())
+        self._runner.close()
+
+
+# OpenAI Batch API limits per job for /v1/embeddings
+BATCH_API_MAX_REQUESTS = 50_000
+BATCH_API_MAX_FILE_BYTES = 200 * 1024 * 1024
+_BATCH_TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+
+def _batch_input_files(model: str, texts: List[str]) -> List[Tuple[bytes, int]]:
+    """
+    Build JSONL input files (one request per text, custom_id "chunk-{i}" over all texts),
+    split so each job stays within BATCH_API_MAX_REQUESTS and BATCH_API_MAX_FILE_BYTES.
+    Returns (file bytes, number of requests) per job.
+    """
+    files: List[Tuple[bytes, int]] = []
+    buf = io.BytesIO()
+    n = 0
+    for i, text in enumerate(texts):
+        line = {
+            "custom_id": f"chunk-{i}",
+            "method": "POST",
+            "url": "/v1/embeddings",
+            "body": {"model": model, "input": text},
+        }
+        data = json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n"
+        if n and (n >= BATCH_API_MAX_REQUESTS or buf.tell() + len(data) > BATCH_API_MAX_FILE_BYTES):
+            files.append((buf.getvalue(), n))
+            buf = io.BytesIO()
+            n = 0
+        buf.write(data)
+        n += 1
+    files.append((buf.getvalue(), n))
+    return files
+
+
+def _batch_results(client: OpenAI, batch: Any) -> Dict[str, List[float]]:
+    """Read a completed batch's output file: custom_id -> embedding."""
+    by_id: Dict[str, List[float]] = {}
+    content = client.files.content(batch.output_file_id)
+    for raw in content.text.splitlines():
+        if not raw.strip():
+            continue
+        result = json.loads(raw)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            raise RuntimeError(f"Embedding batch request {result.get('custom_id')} failed: {result.get('error')}")
+        by_id[result["custom_id"]] = response["body"]["data"][0]["embedding"]
+    return by_id
+
+
+def embed_batch_api(
+    client: OpenAI,
+    model: str,
+    texts: List[str],
+    poll_interval: float = 30.0,
+) -> List[List[float]]:
+    """
+    Embed texts via the OpenAI Batch API (half the cost, separate rate limits).
+    Submits one JSONL request per text, split across as many batch jobs as the
+    per-job limits require, polls until all finish, and returns embeddings in
+    input order. Only suitable for latency-tolerant bulk ingests.
+    """
+    if not texts:
+        return []
+
+    batches = []
+    for data, n in _batch_input_files(model, texts):
+        batch_file = client.files.create(file=("embeddings.jsonl", data), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/embeddings",
+            completion_window="24h",
+        )
+        print(f"Submitted embedding batch {batch.id} ({n} chunks)")
+        batches.append(batch)
+
+    while any(b.status not in _BATCH_TERMINAL for b in batches):
+        time.sleep(poll_interval)
+        for j, batch in enumerate(batches):
+            if batch.status in _BATCH_TERMINAL:
+                continue
+            batch = batches[j] = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts is not None:
+                print(f"  Batch {batch.id}: {batch.status} ({counts.completed}/{counts.total})")
+            if batch.status in _BATCH_TERMINAL and batch.status != "completed":
+                # The result set is unusable without this job; stop paying for the rest
+                for other in batches:
+                    if other.status not in _BATCH_TERMINAL:
+                        client.batches.cancel(other.id)
+                raise RuntimeError(f"Embedding batch {batch.id} ended with status {batch.status}")
+
+    by_id: Dict[str, List[float]] = {}
+    for batch in batches:
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Embedding batch {batch.id} ended with status {batch.status}")
+        by_id.update(_batch_results(client, batch))
+
+    missing = len(texts) - len(by_id)
+    if missing:
+        raise RuntimeError(f"Embedding batches are missing {missing} results")
+    return [by_id[f"chunk-{i}"] for i in range(len(texts))]
+
+
+# ----------------------------
+# Embedding cache
+# ----------------------------
+
+class CachedEmbedder:
+    """
+    Local sqlite cache keyed by "{model}:{sha256(text)}" in front of an embedding call.
+    Vectors are stored as packed float32 bytes. Only cache misses hit the API.
+    """
+
+    def __init__(self, model: str, path: str = ".cache/embeddings.sqlite"):
+        self.model = model
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB)")
+
+    def _key(self, text: str) -> str:
+        return f"{self.model}:{sha256_text(text)}"
+
+    def get(self, text: str) -> Optional[List[float]]:
+        row = self._conn.execute("SELECT value FROM embeddings WHERE key = ?", (self._key(text),)).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist()
+
+    def embed(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        """Return embeddings for texts, calling embed_fn only on unique cache misses (in order)."""
+        results: List[Optional[List[float]]] = [self.get(t) for t in texts]
+        misses: Dict[str, List[int]] = {}
+        for i, (text, emb) in enumerate(zip(texts, results)):
+            if emb is None:
+                misses.setdefault(text, []).append(i)
+
+        if misses:
+            miss_texts = list(misses)
+            miss_embeddings = embed_fn(miss_texts)
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, value) VALUES (?, ?)",
+                    [(self._key(t), array("f", e).tobytes()) for t, e in zip(miss_texts, miss_embeddings)],
+                )
+            for text, emb in zip(miss_texts, miss_embeddings):
+                for i in misses[text]:
+                    results[i] = emb
+
+        return results  # type: ignore[return-value]
+
+    def close(self) -> None:
+        self._conn.close()
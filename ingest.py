@@ -1,4 +1,3 @@
-import json
 import os
 import unicodedata
 from datetime import datetime, timezone
@@ -14,6 +13,7 @@ if __name__ == "__main__":
 else:
     load_dotenv()
 
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from config import (
@@ -25,6 +25,7 @@ from config import (
     SEPARATORS,
 )
 from chroma_ingest import upsert_chroma
+from utils import load_json_bytes
 
 
 # ----------------------------
@@ -39,6 +40,9 @@ def read_utf8(path: Path | str) -> str:
 # Normalize
 # ----------------------------
 def normalize_unicode(text: str) -> str:
+    # ASCII is already NFKC-normal; isascii() is a cheap C scan
+    if text.isascii():
+        return text
     return unicodedata.normalize("NFKC", text)
 
 
@@ -55,16 +59,59 @@ def build_splitter():
     )
 
 
+# Texts shorter than this become a single chunk without running the splitter
+SHORT_TEXT_CHARS = 32
+
+
 def chunk_text(text: str, source: str) -> list:
-    splitter = build_splitter()
-    docs = splitter.create_documents(
-        texts=[text],
-        metadatas=[{"source": source, "category": "tb"}],
-    )
+    return chunk_texts([text], [source])
 
+
+def _short_text_docs(text: str, source: str, item: int) -> list:
+    """A short text as at most one Document (no splitter run)."""
+    content = text.strip()
+    if not content:
+        return []
+    metadata = {"source": source, "category": "tb", "start_index": text.find(content), "_item": item}
+    return [Document(page_content=content, metadata=metadata)]
+
+
+def chunk_texts(texts: list[str], sources: list[str]) -> list:
+    """
+    Chunk many texts with a single splitter call; chunks are numbered per input text.
+    Texts under SHORT_TEXT_CHARS skip the splitter and become one chunk each.
+    """
+    per_item: list[list] = [[] for _ in texts]
+    long_items = []
+    for n, (text, source) in enumerate(zip(texts, sources)):
+        if len(text) < SHORT_TEXT_CHARS:
+            per_item[n] = _short_text_docs(text, source, n)
+        else:
+            long_items.append(n)
+
+    if long_items:
+        splitter = build_splitter()
+        docs = splitter.create_documents(
+            texts=[texts[n] for n in long_items],
+            metadatas=[{"source": sources[n], "category": "tb", "_item": n} for n in long_items],
+        )
+        for d in docs:
+            per_item[d.metadata["_item"]].append(d)
+
+    return _number_chunks([d for docs in per_item for d in docs])
+
+
+def _number_chunks(docs: list) -> list:
+    """Add chunk_index/chunk_id/char span metadata; the index restarts for each input text."""
     created_at = datetime.now(timezone.utc).isoformat()
 
-    for i, d in enumerate(docs):
+    i = 0
+    prev_item = object()
+    for d in docs:
+        item = d.metadata.pop("_item", None)
+        i = i + 1 if item == prev_item else 0
+        prev_item = item
+        source = d.metadata["source"]
         start = d.metadata.get("start_index", 0)
         d.metadata.update({
             "chunk_index": i,
@@ -101,31 +148,33 @@ def _text_from_item(item: str | dict, index: int, base_source: str) -> tuple[str
         if text is None and ("q" in item or "a" in item):
             text = " ".join(str(item.get(k, "")) for k in ("q", "a") if item.get(k))
         if text is None:
-            text = json.dumps(item, ensure_ascii=False)
+            # Embeddings don't need JSON structure; skip serializer + punctuation tokens
+            text = " ".join(str(v) for v in item.values())
         source = item.get("id") or item.get("source") or default_source
         return str(text), str(source)
     return str(item), default_source
 
 
 def _docs_from_items(items: list, base_source: str) -> list:
-    """Chunk a list of JSON items into Documents."""
-    docs = []
+    """Chunk a list of JSON items into Documents (one splitter call for all items)."""
+    texts, sources = [], []
     for i, item in enumerate(items):
         text, source = _text_from_item(item, i, base_source)
-        docs.extend(chunk_text(normalize_unicode(text), source=source))
-    return docs
+        texts.append(normalize_unicode(text))
+        sources.append(source)
+    return chunk_texts(texts, sources) if texts else []
 
 
 def load_corpus() -> list:
     """Load from data/files.json or all data/*.json; chunk and return Documents (single collection)."""
     if FILES_JSON.exists():
-        data = json.loads(read_utf8(FILES_JSON))
+        data = load_json_bytes(FILES_JSON.read_bytes())
         return _docs_from_items(_items_from_data(data), "data/files.json")
     if not DATA_DIR.exists():
         return []
     all_docs = []
     for path in sorted(DATA_DIR.glob("*.json")):
-        data = json.loads(read_utf8(path))
+        data = load_json_bytes(path.read_bytes())
         base = str(path.relative_to(PROJECT_ROOT))
         all_docs.extend(_docs_from_items(_items_from_data(data), base))
     return all_docs
@@ -140,7 +189,7 @@ def load_corpus_by_collection() -> list[tuple[str, list]]:
         collection = FILE_TO_COLLECTION.get(path.name)
         if not collection:
             continue
-        data = json.loads(read_utf8(path))
+        data = load_json_bytes(path.read_bytes())
         base = str(path.relative_to(PROJECT_ROOT))
         docs = _docs_from_items(_items_from_data(data), base)
         if docs:
@@ -6,9 +6,9 @@ Architecture:
 - MongoDB Atlas: Stores text + metadata + embedding vector with Vector Search index
 
 Install:
-  pip install pymongo[srv] openai python-dotenv tiktoken
+  pip install pymongo[srv,zstd] openai python-dotenv tiktoken orjson numpy blake3
   # Optional for PDF:
-  pip install pdfplumber
+  pip install pypdfium2
 
 Env (.env):
   MONGODB_URI="mongodb+srv://<user>:<pass>@<cluster>/<db>?retryWrites=true&w=majority"
@@ -16,31 +16,51 @@ Env (.env):
   MONGODB_COLLECTION="rag_chunks"
   OPENAI_API_KEY="..."
   OPENAI_EMBED_MODEL="text-embedding-3-small"
+  EMBED_BINARY=0
   CHUNK_TOKENS=1000
   OVERLAP_TOKENS=150
   BATCH_SIZE=64
+  MONGO_BATCH_SIZE=1000
+  INGEST_WORKERS=8
+  IO_WORKERS=32
+  EMBED_CONCURRENCY=8
+  EMBED_CACHE_PATH=".cache/embeddings.sqlite"
 """
 
 from __future__ import annotations
 
 import os
 import glob
-from typing import Any, Dict, List
+import stat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
-from pymongo import MongoClient
 from openai import OpenAI
 
-from chunk import chunk_text_tokens
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+
+from chunk import chunk_texts_tokens
 from config import Settings
-from db import delete_chunks_by_source, ensure_unique_index, upsert_chunks
-from embed import embed_texts_openai
-from normalize import detect_file_type, normalize_document
+from db import (
+    delete_chunks_by_source,
+    drop_secondary_indexes,
+    ensure_unique_index,
+    get_mongo_client,
+    rebuild_indexes,
+    upsert_chunks,
+)
+from embed import AsyncBatchEmbedder, CachedEmbedder, embed_batch_api, embed_texts_openai
+from normalize import SUPPORTED_EXTENSIONS, detect_file_type, normalize_document
 from state import load_state, save_state, should_skip_file, update_file_state
 from utils import (
     compute_stable_id,
-    get_file_mtime,
+    file_stat_iso,
     now_iso,
+    process_pool_context,
+    sha256_file,
     sha256_text,
+    stable_id_prefix,
 )
 
 
@@ -48,103 +68,250 @@ from utils import (
 # Main ingestion
 # ----------------------------
 
-def build_docs_for_file(
-    filepath: str,
-    embed_client: OpenAI,
-    settings: Settings,
-) -> List[Dict[str, Any]]:
+# Above this many files to ingest, secondary indexes are dropped and rebuilt after
+BULK_LOAD_MIN_FILES = 10
+
+# Normalization only moves to a process pool when there's real parsing to spread out:
+# any PDF, or more than this many bytes in total. Small JSON/MD batches run inline,
+# well under the pool's startup cost (spawn re-imports this module in every worker).
+PREPARE_POOL_MIN_BYTES = 4 * 1024 * 1024
+
+# Pending files are normalized, chunked and ingested in groups of about this many input
+# bytes, so peak memory follows the group rather than the whole pending corpus
+INGEST_GROUP_BYTES = 64 * 1024 * 1024
+
+
+# Tags by filename keyword; first match wins, else ["document"]
+FILENAME_TAGS = [
+    ("profile", ["profile", "resume", "candidate"]),
+    ("resume", ["resume", "candidate"]),
+    ("qa", ["qa", "questions"]),
+]
+
+
+def file_tags(filename: str) -> List[str]:
+    """Determine tags based on file name."""
+    name = filename.lower()
+    for keyword, tags in FILENAME_TAGS:
+        if keyword in name:
+            return list(tags)
+    return ["document"]
+
+
+def _stat_file(filepath: str) -> Optional[os.stat_result]:
+    """os.stat for the I/O thread pool; None if the file vanished or can't be read."""
+    try:
+        return os.stat(filepath)
+    except OSError:
+        return None
+
+
+def _hash_file(filepath: str) -> Union[str, Exception]:
+    """sha256_file for the I/O thread pool; a failure is returned as its exception."""
+    try:
+        return sha256_file(filepath)
+    except Exception as e:
+        return e
+
+
+def prepare_file(filepath: str, trust_canonical_json: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
-    Process a single file: normalize -> chunk -> embed -> build MongoDB documents.
-    
-    Returns list of document dicts matching the target schema.
+    Normalize a single file to (text, metadata) ahead of batch tokenization.
     """
-    filename = os.path.basename(filepath)
-    source_id = filename
-    file_type = detect_file_type(filepath)
-    mtime = get_file_mtime(filepath)
-    
-    # Normalize document to text
-    text, file_metadata = normalize_document(filepath)
-    content_hash = sha256_text(text)
+    return normalize_document(filepath, trust_canonical_json)
+
+
+def byte_budget_groups(sizes: List[int], budget: int) -> List[range]:
+    """
+    Split file indexes into consecutive groups of at most budget bytes in total
+    (a file larger than the budget forms a group of its own).
+    """
+    groups: List[range] = []
+    start = total = 0
+    for i, size in enumerate(sizes):
+        if i > start and total + size > budget:
+            groups.append(range(start, i))
+            start, total = i, 0
+        total += size
+    if start < len(sizes):
+        groups.append(range(start, len(sizes)))
+    return groups
+
+
+def needs_prepare_pool(filepaths: List[str], sizes: List[int]) -> bool:
+    """True if normalizing these files is worth starting a process pool."""
+    return sum(sizes) > PREPARE_POOL_MIN_BYTES or any(detect_file_type(f) == "pdf" for f in filepaths)
+
+
+def prepare_files(
+    filepaths: List[str],
+    max_workers: int,
+    trust_canonical_json: bool = False,
+) -> List[Union[Tuple[str, Optional[Dict[str, Any]]], Exception]]:
+    """
+    Normalize files across a process pool (PDF/JSON parsing is CPU-bound Python).
+    Results keep input order; a file that failed is returned as its exception.
+    """
+    workers = min(max_workers, len(filepaths))
+    if workers <= 1:
+        results: List[Union[Tuple[str, Optional[Dict[str, Any]]], Exception]] = []
+        for filepath in filepaths:
+            try:
+                results.append(prepare_file(filepath, trust_canonical_json))
+            except Exception as e:
+                results.append(e)
+        return results
     
-    # Chunk
-    chunks = chunk_text_tokens(
-        text=text,
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context()) as pool:
+        futures = [pool.submit(prepare_file, filepath, trust_canonical_json) for filepath in filepaths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def chunk_prepared_texts(texts: List[str], settings: Settings) -> List[List[str]]:
+    """
+    Chunk all prepared texts at once; tokenization runs as one multi-threaded batch.
+    """
+    return chunk_texts_tokens(
+        texts=texts,
         chunk_tokens=settings.chunk_tokens,
         overlap_tokens=settings.overlap_tokens,
         model=settings.embed_model,
         chunk_chars=settings.chunk_chars,
         overlap_chars=settings.overlap_chars,
     )
+
+
+def embed_chunks(
+    chunks: List[str],
+    embed_client: OpenAI,
+    settings: Settings,
+    cache: Optional[CachedEmbedder] = None,
+    async_embedder: Optional[AsyncBatchEmbedder] = None,
+) -> np.ndarray:
+    """
+    Embed chunks in batches (several requests in flight via async_embedder; sync loop as fallback).
+    With a cache, only chunks not embedded before are sent to the API.
+    
+    Returns a (len(chunks), dims) float32 array rather than lists of Python floats.
+    """
+    if cache is not None:
+        cached = cache.embed(
+            chunks, lambda misses: embed_chunks(misses, embed_client, settings, async_embedder=async_embedder)
+        )
+        return np.asarray(cached, dtype=np.float32)
+    
+    batches = [chunks[i : i + settings.batch_size] for i in range(0, len(chunks), settings.batch_size)]
+    if async_embedder is not None and len(batches) > 1:
+        results = async_embedder.embed_batches(batches)
+    else:
+        results = (embed_texts_openai(embed_client, settings.embed_model, batch) for batch in batches)
+    
+    embeddings: Optional[np.ndarray] = None
+    offset = 0
+    for batch_embeddings in results:
+        block = np.asarray(batch_embeddings, dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.empty((len(chunks), block.shape[1]), dtype=np.float32)
+        embeddings[offset : offset + len(block)] = block
+        offset += len(block)
+    return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+
+def build_docs_for_file(
+    filepath: str,
+    chunks: List[str],
+    file_metadata: Optional[Dict[str, Any]],
+    mtime: str,
+    embed_client: OpenAI,
+    settings: Settings,
+    embeddings: Optional[np.ndarray] = None,
+    cache: Optional[CachedEmbedder] = None,
+    async_embedder: Optional[AsyncBatchEmbedder] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Finalize a single file from its chunks: embed -> build MongoDB documents.
+    Pass precomputed embeddings (e.g. from the Batch API) to skip the embedding calls.
     
+    Yields lists of document dicts matching the target schema, one window of
+    batch_size * embed_concurrency chunks at a time, so only that window's
+    embeddings and docs are held in memory.
+    """
     if not chunks:
-        return []
+        return
     
-    # Embed in batches
-    embeddings: List[List[float]] = []
-    for i in range(0, len(chunks), settings.batch_size):
-        batch = chunks[i : i + settings.batch_size]
-        batch_embeddings = embed_texts_openai(embed_client, settings.embed_model, batch)
-        embeddings.extend(batch_embeddings)
+    filename = os.path.basename(filepath)
+    source_id = filename
+    file_type = detect_file_type(filepath)
+    ts = now_iso()
     
-    # Build MongoDB documents matching target schema
-    docs: List[Dict[str, Any]] = []
-    dims = len(embeddings[0]) if embeddings else 1536
+    # Extract metadata (same for every chunk of the file)
+    title = file_metadata.get("title") if file_metadata else None
+    if not title:
+        # Fallback: use filename without extension
+        title = os.path.splitext(filename)[0]
+    tags = file_tags(filename)
+    id_prefix = stable_id_prefix(source_id)
     
-    for i, (chunk_text, emb) in enumerate(zip(chunks, embeddings)):
-        chunk_id = f"{source_id}::chunk_{i:04d}"
-        chunk_hash = sha256_text(chunk_text)
-        
-        # Compute stable _id
-        doc_id = compute_stable_id(source_id, chunk_id, chunk_hash)
-        
-        # Extract metadata
-        title = file_metadata.get("title") if file_metadata else None
-        if not title:
-            # Fallback: use filename without extension
-            title = os.path.splitext(filename)[0]
-        
-        # Determine tags based on file type and name
-        tags = []
-        if "profile" in filename.lower():
-            tags.extend(["profile", "resume", "candidate"])
-        elif "resume" in filename.lower():
-            tags.extend(["resume", "candidate"])
-        elif "qa" in filename.lower():
-            tags.extend(["qa", "questions"])
+    window = settings.batch_size * max(1, settings.embed_concurrency)
+    for w in range(0, len(chunks), window):
+        window_chunks = chunks[w : w + window]
+        if embeddings is not None:
+            window_embeddings = embeddings[w : w + window]
         else:
-            tags.append("document")
+            window_embeddings = embed_chunks(
+                window_chunks, embed_client, settings, cache=cache, async_embedder=async_embedder
+            )
+        dims = window_embeddings.shape[1]
         
-        doc = {
-            "_id": doc_id,
-            "chunk_id": chunk_id,
-            "source": {
-                "source_id": source_id,
-                "path": filepath,
-                "type": file_type,
-                "mtime": mtime,
-            },
-            "text": chunk_text,
-            "metadata": {
-                "title": title,
-                "section": f"chunk_{i}",
-                "tags": tags,
-                "lang": "en",
-            },
-            "embedding": emb,
-            "embedding_model": settings.embed_model,
-            "dims": dims,
-            "created_at": now_iso(),
-            "updated_at": now_iso(),
-        }
-        docs.append(doc)
-    
-    return docs
+        # Build MongoDB documents matching target schema
+        docs: List[Dict[str, Any]] = []
+        for i, (chunk_text, emb) in enumerate(zip(window_chunks, window_embeddings), start=w):
+            chunk_id = f"{source_id}::chunk_{i:04d}"
+            chunk_hash = sha256_text(chunk_text)
+            
+            # Compute stable _id
+            doc_id = compute_stable_id(source_id, chunk_id, chunk_hash, prefix=id_prefix)
+            
+            doc = {
+                "_id": doc_id,
+                "chunk_id": chunk_id,
+                "source": {
+                    "source_id": source_id,
+                    "path": filepath,
+                    "type": file_type,
+                    "mtime": mtime,
+                },
+                "text": chunk_text,
+                "metadata": {
+                    "title": title,
+                    "section": f"chunk_{i}",
+                    "tags": tags,
+                    "lang": "en",
+                },
+                "embedding": (
+                    Binary.from_vector(emb.tolist(), BinaryVectorDtype.FLOAT32) if settings.embed_binary else emb.tolist()
+                ),
+                "embedding_model": settings.embed_model,
+                "embedding_dtype": "float32" if settings.embed_binary else "float64",
+                "dims": dims,
+                "created_at": ts,
+                "updated_at": ts,
+            }
+            docs.append(doc)
+        
+        yield docs
 
 
 def ingest_folder(
     folder_glob: str = "data/**/*",
     skip_unchanged: bool = True,
+    use_batch_api: bool = False,
 ) -> None:
     """
     Ingest all matching files from folder.
@@ -152,91 +319,178 @@ def ingest_folder(
     Args:
         folder_glob: Glob pattern for files to ingest (e.g., "data/**/*.json")
         skip_unchanged: If True, skip files that haven't changed since last ingest
+        use_batch_api: If True, embed all chunks via OpenAI Batch API jobs (split at the per-job limits)
     """
     settings = Settings()
     
     assert settings.mongodb_uri, "Missing MONGODB_URI"
     assert settings.openai_api_key, "Missing OPENAI_API_KEY"
     
-    # MongoDB connection
-    mongo = MongoClient(settings.mongodb_uri)
+    # MongoDB connection (cached client; w=1 since ingest only needs primary acknowledgement)
+    mongo = get_mongo_client(settings.mongodb_uri)
     db = mongo[settings.mongodb_db]
     col = db[settings.mongodb_collection]
     ensure_unique_index(col)
     
-    # OpenAI client
+    # OpenAI clients (+ optional local embedding cache); the async client lives for the whole run
     embed_client = OpenAI(api_key=settings.openai_api_key)
+    async_embedder = (
+        AsyncBatchEmbedder(settings.openai_api_key, settings.embed_model, settings.embed_concurrency)
+        if settings.embed_concurrency > 1
+        else None
+    )
+    cache = CachedEmbedder(settings.embed_model, settings.embed_cache_path) if settings.embed_cache_path else None
     
     # Load state for incremental ingestion
     state = load_state()
     
-    # Find files (support multiple extensions)
-    patterns = [
-        folder_glob,
-        folder_glob.replace("**/*", "**/*.json"),
-        folder_glob.replace("**/*", "**/*.md"),
-        folder_glob.replace("**/*", "**/*.txt"),
-        folder_glob.replace("**/*", "**/*.pdf"),
+    # Find files in a single pass, keeping supported extensions only.
+    # One stat per file (on the I/O thread pool), reused below for mtime/size.
+    candidates = [
+        f for f in glob.iglob(folder_glob, recursive=True)
+        if os.path.splitext(f)[1].lower() in SUPPORTED_EXTENSIONS
     ]
+    with ThreadPoolExecutor(max_workers=settings.io_workers) as io_pool:
+        stats: Dict[str, os.stat_result] = {
+            f: st for f, st in zip(candidates, io_pool.map(_stat_file, candidates))
+            if st is not None and stat.S_ISREG(st.st_mode)
+        }
+        files = sorted(stats)
+        
+        print(f"Found {len(files)} files matching pattern")
+        
+        total_docs = 0
+        skipped = 0
+        
+        # Skip check: mtime + size first, raw-bytes hash only when they changed.
+        # State lookups stay on this thread (the SQLite connection isn't shared);
+        # the files that need hashing are hashed on the I/O pool.
+        to_hash: List[Tuple[str, str, int]] = []
+        for filepath in files:
+            mtime, size = file_stat_iso(stats[filepath])
+            mtime_ns = stats[filepath].st_mtime_ns
+            if skip_unchanged and should_skip_file(filepath, mtime_ns, size, state):
+                print(f"Skipping unchanged: {filepath}")
+                skipped += 1
+                continue
+            to_hash.append((filepath, mtime, mtime_ns, size))
+        
+        hashes = io_pool.map(_hash_file, [filepath for filepath, _, _, _ in to_hash]) if skip_unchanged else [""] * len(to_hash)
+        
+        # Unchanged files are never normalized.
+        to_prepare: List[str] = []
+        versions: List[Tuple[str, str, int, int]] = []  # (content_hash, mtime, mtime_ns, size) recorded in state after ingest
+        for (filepath, mtime, mtime_ns, size), content_hash in zip(to_hash, hashes):
+            if isinstance(content_hash, Exception):
+                print(f"  ✗ Error processing {filepath}: {content_hash}")
+                continue
+            
+            # Check if file should be skipped (incremental ingestion)
+            if skip_unchanged and should_skip_file(filepath, mtime_ns, size, state, hash_fn=lambda: content_hash):
+                print(f"Skipping unchanged: {filepath}")
+                skipped += 1
+                # Touched but identical content: refresh mtime/size so the next run takes the fast path
+                update_file_state(filepath, content_hash, mtime, state, size=size, mtime_ns=mtime_ns)
+                continue
+            to_prepare.append(filepath)
+            versions.append((content_hash, mtime, mtime_ns, size))
     
-    all_files = set()
-    for pattern in patterns:
-        all_files.update(glob.glob(pattern, recursive=True))
-    
-    # Filter out directories
-    files = sorted([f for f in all_files if os.path.isfile(f)])
-    
-    print(f"Found {len(files)} files matching pattern")
-    
-    total_docs = 0
-    skipped = 0
+    # Large loads: skip per-document index maintenance, rebuild once at the end
+    # (ensure_unique_index recreates them on the next run if this one is interrupted)
+    bulk_load = len(to_prepare) > BULK_LOAD_MIN_FILES
+    if bulk_load:
+        drop_secondary_indexes(col)
     
-    for filepath in files:
-        # Check if file should be skipped (incremental ingestion)
-        if skip_unchanged:
-            try:
-                text, _ = normalize_document(filepath)
-                content_hash = sha256_text(text)
-                mtime = get_file_mtime(filepath)
-                
-                if should_skip_file(filepath, content_hash, mtime, state):
-                    print(f"Skipping unchanged: {filepath}")
-                    skipped += 1
-                    continue
-            except Exception as e:
-                print(f"Warning: Could not check state for {filepath}: {e}")
+    # Normalize -> chunk -> embed -> upsert one group of files at a time, so texts,
+    # token lists and chunks are held for at most INGEST_GROUP_BYTES of input
+    for group in byte_budget_groups([size for _, _, _, size in versions], INGEST_GROUP_BYTES):
+        group_files = [to_prepare[i] for i in group]
+        group_versions = [versions[i] for i in group]
+        
+        # Normalize changed files once (in parallel)
+        pending: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Optional[Dict[str, Any]]] = []
+        pending_versions: List[Tuple[str, str, int, int]] = []
+        workers = settings.ingest_workers if needs_prepare_pool(group_files, [size for _, _, _, size in group_versions]) else 1
+        for filepath, version, prepared in zip(group_files, group_versions, prepare_files(group_files, workers, settings.json_trust_canonical)):
+            if isinstance(prepared, Exception):
+                print(f"  ✗ Error processing {filepath}: {prepared}")
+                continue
+            text, file_metadata = prepared
+            pending.append(filepath)
+            texts.append(text)
+            metadatas.append(file_metadata)
+            pending_versions.append(version)
+        
+        all_chunks: List[Optional[List[str]]] = chunk_prepared_texts(texts, settings) if texts else []
+        del texts  # the chunks carry everything needed from here on
         
-        # Process file
-        try:
-            print(f"Processing: {filepath}")
-            docs = build_docs_for_file(filepath, embed_client, settings)
+        # Batch API: embed every chunk of the group via Batch API jobs, then split per file
+        all_embeddings: List[Optional[np.ndarray]] = [None] * len(all_chunks)
+        if use_batch_api and any(all_chunks):
+            flat_chunks = [c for chunks in all_chunks for c in chunks]
+            submit = lambda texts: embed_batch_api(embed_client, settings.embed_model, texts)
+            flat = np.asarray(
+                cache.embed(flat_chunks, submit) if cache is not None else submit(flat_chunks),
+                dtype=np.float32,
+            )
+            del flat_chunks
+            offset = 0
+            for n, chunks in enumerate(all_chunks):
+                all_embeddings[n] = flat[offset : offset + len(chunks)]
+                offset += len(chunks)
+            del flat
+        
+        for n, (filepath, file_metadata, (content_hash, mtime, mtime_ns, size)) in enumerate(
+            zip(pending, metadatas, pending_versions)
+        ):
+            # Take this file's chunks/embeddings out of the group so they're freed once it's upserted
+            chunks, embeddings = all_chunks[n], all_embeddings[n]
+            all_chunks[n] = all_embeddings[n] = None
             
-            if docs:
-                source_id = docs[0]["source"]["source_id"]
-                deleted = delete_chunks_by_source(col, source_id)
-                if deleted:
-                    print(f"  Deleted {deleted} old chunks for {source_id}")
-                upsert_chunks(col, docs)
-                total_docs += len(docs)
-                
-                # Update state
-                if skip_unchanged:
-                    text, _ = normalize_document(filepath)
-                    content_hash = sha256_text(text)
-                    mtime = get_file_mtime(filepath)
-                    update_file_state(filepath, content_hash, mtime, state)
+            # Process file: stream embed -> upsert one window at a time
+            try:
+                print(f"Processing: {filepath}")
+                file_docs = 0
+                for docs in build_docs_for_file(
+                    filepath, chunks, file_metadata, mtime, embed_client, settings,
+                    embeddings=embeddings, cache=cache, async_embedder=async_embedder,
+                ):
+                    if not file_docs:
+                        # Old chunks go only once the first window has embedded successfully
+                        source_id = docs[0]["source"]["source_id"]
+                        deleted = delete_chunks_by_source(col, source_id)
+                        if deleted:
+                            print(f"  Deleted {deleted} old chunks for {source_id}")
+                    upsert_chunks(col, docs, batch_size=settings.mongo_batch_size)
+                    file_docs += len(docs)
+                total_docs += file_docs
                 
-                print(f"  ✓ Ingested {len(docs)} chunks")
-            else:
-                print(f"  ⚠ No chunks generated")
-        except Exception as e:
-            print(f"  ✗ Error processing {filepath}: {e}")
-            import traceback
-            traceback.print_exc()
+                if file_docs:
+                    # Update state
+                    if skip_unchanged:
+                        update_file_state(filepath, content_hash, mtime, state, size=size, mtime_ns=mtime_ns)
+                    
+                    print(f"  ✓ Ingested {file_docs} chunks")
+                else:
+                    print(f"  ⚠ No chunks generated")
+            except Exception as e:
+                print(f"  ✗ Error processing {filepath}: {e}")
+                import traceback
+                traceback.print_exc()
+    
+    if bulk_load:
+        rebuild_indexes(col)
     
     # Save state
     if skip_unchanged:
         save_state(state)
+    state.close()
+    if cache is not None:
+        cache.close()
+    if async_embedder is not None:
+        async_embedder.close()
     
     print(f"\nDone.")
     print(f"  Total chunks upserted: {total_docs}")
@@ -253,11 +507,12 @@ if __name__ == "__main__":
     import os
     import sys
 
-    # Parse: python main.py [dev|qa|prod] [local|remote] [pattern] [--force]
+    # Parse: python main.py [dev|qa|prod] [local|remote] [pattern] [--force] [--batch-api]
     COLLECTIONS = {"dev": "collection_taixingbi_dev", "qa": "collection_taixingbi_qa", "prod": "collection_taixingbi_prod"}
     TARGETS = ("local", "remote")
-    args = [a for a in sys.argv[1:] if a != "--force"]
+    args = [a for a in sys.argv[1:] if a not in ("--force", "--batch-api")]
     skip_unchanged = "--force" not in sys.argv
+    use_batch_api = "--batch-api" in sys.argv
 
     # 1) env: dev | qa | prod
     env_arg = args[0] if args and args[0] in COLLECTIONS else None
@@ -276,4 +531,4 @@ if __name__ == "__main__":
 
     pattern = args[0] if args else "data/**/*"
 
-    ingest_folder(pattern, skip_unchanged=skip_unchanged)
+    ingest_folder(pattern, skip_unchanged=skip_unchanged, use_batch_api=use_batch_api)
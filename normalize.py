@@ -1,51 +1,83 @@
 """Document normalization: convert various file formats to stable text."""
 
-import json
+import importlib
+import mmap
+import multiprocessing
 import os
-from typing import Any, Dict, Optional, Tuple
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from utils import stable_json_text
+from utils import load_json_bytes, load_json_canonical, process_pool_context
+
+# Extension -> file type
+_EXT_MAP = {
+    ".json": "json",
+    ".md": "md",
+    ".markdown": "md",
+    ".txt": "txt",
+    ".pdf": "pdf",
+}
+
+SUPPORTED_EXTENSIONS = set(_EXT_MAP)
 
 
 def detect_file_type(filepath: str) -> str:
     """Detect file type from extension."""
-    ext = os.path.splitext(filepath)[1].lower()
-    if ext == ".json":
-        return "json"
-    elif ext in [".md", ".markdown"]:
-        return "md"
-    elif ext == ".txt":
-        return "txt"
-    elif ext == ".pdf":
-        return "pdf"
-    else:
-        return "unknown"
+    return _EXT_MAP.get(os.path.splitext(filepath)[1].lower(), "unknown")
+
+
+_MISSING = object()
+
+
+def _json_metadata(obj: Any) -> Optional[Dict[str, Any]]:
+    """Pull metadata from a parsed JSON document: its "metadata", else a profile title."""
+    if not isinstance(obj, dict):
+        return None
+    metadata = obj.get("metadata", _MISSING)
+    if metadata is not _MISSING:
+        return metadata or None
+    # Try to extract useful metadata from profile structure
+    profile = obj.get("profile")
+    if isinstance(profile, dict):
+        return {"title": profile.get("name") or profile.get("title", "Profile")}
+    return None
 
 
-def normalize_json(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+def normalize_json(filepath: str, trust_canonical: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Normalize JSON file to stable text.
+    With trust_canonical, the file is taken to be canonical already (sorted keys,
+    2-space indent) and its raw text is used as-is, skipping the re-serialization.
     Returns: (normalized_text, metadata_dict)
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        obj = json.load(f)
-    
-    text = stable_json_text(obj)
-    
-    # Extract metadata if available
-    metadata = {}
-    if isinstance(obj, dict):
-        if "metadata" in obj:
-            metadata = obj["metadata"]
-        elif "profile" in obj:
-            # Try to extract useful metadata from profile structure
-            profile = obj.get("profile", {})
-            if isinstance(profile, dict):
-                metadata = {
-                    "title": profile.get("name") or profile.get("title", "Profile"),
-                }
-    
-    return text, metadata if metadata else None
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    if trust_canonical:
+        obj, text = load_json_bytes(raw), raw.decode("utf-8")
+    else:
+        obj, text = load_json_canonical(raw)
+    return text, _json_metadata(obj)
+
+
+def _read_text(filepath: str) -> str:
+    """
+    Read a UTF-8 text file via mmap: the decode reads straight from the page-cache
+    mapping instead of an intermediate bytes copy. Newlines are translated like
+    text-mode open() (\r\n and \r -> \n).
+    """
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+_TITLE_RE = re.compile(r"^# (.*)$", re.MULTILINE)
+_TITLE_SCAN_LINES = 10
 
 
 def normalize_markdown(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
@@ -53,16 +85,19 @@ def normalize_markdown(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
     Normalize Markdown file to text.
     Returns: (normalized_text, metadata_dict)
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        text = f.read()
+    text = _read_text(filepath)
     
-    # Extract title from first heading if available
+    # Extract title from first heading if available (first 10 lines only;
+    # slice the head instead of splitting the whole document into lines)
     metadata = {}
-    lines = text.split("\n")
-    for line in lines[:10]:  # Check first 10 lines
-        if line.startswith("# "):
-            metadata["title"] = line[2:].strip()
+    end = -1
+    for _ in range(_TITLE_SCAN_LINES):
+        end = text.find("\n", end + 1)
+        if end == -1:
             break
+    match = _TITLE_RE.search(text if end == -1 else text[:end])
+    if match:
+        metadata["title"] = match.group(1).strip()
     
     return text, metadata if metadata else None
 
@@ -72,64 +107,153 @@ def normalize_text(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
     Normalize plain text file.
     Returns: (normalized_text, metadata_dict)
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        text = f.read()
+    text = _read_text(filepath)
     
     return text, None
 
 
+# PDFs with at least this many pages are extracted across a process pool
+PDF_PARALLEL_MIN_PAGES = 32
+# Pages handed to each worker (pdfplumber pages can't be pickled, so workers reopen the file)
+PDF_PAGES_PER_TASK = 8
+
+
+def _extract_pdf_pages(filepath: str, lo: int, hi: int) -> List[str]:
+    """Extract text of pages [lo, hi) in a worker process (pdfplumber page numbers are 1-based)."""
+    import pdfplumber
+    with pdfplumber.open(filepath, pages=list(range(lo + 1, hi + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _extract_pdf_pages_parallel(filepath: str, num_pages: int) -> List[str]:
+    """Extract all pages in PDF_PAGES_PER_TASK ranges across a process pool, in page order."""
+    los = list(range(0, num_pages, PDF_PAGES_PER_TASK))
+    his = [min(num_pages, lo + PDF_PAGES_PER_TASK) for lo in los]
+    text_parts = [""] * num_pages
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(los)), mp_context=process_pool_context()) as pool:
+        for lo, hi, part in zip(los, his, pool.map(_extract_pdf_pages, [filepath] * len(los), los, his)):
+            text_parts[lo:hi] = part
+    return text_parts
+
+
+def _pdf_pages_pdfium(pdfium: Any, filepath: str) -> Tuple[List[str], Dict[str, Any]]:
+    """Extract page texts + metadata with pypdfium2 (PDFium C++ bindings)."""
+    pdf = pdfium.PdfDocument(filepath)
+    try:
+        text_parts = [""] * len(pdf)
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            if text:
+                # PDFium emits \r\n line breaks
+                text_parts[i] = text.replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+        metadata = {}
+        title = pdf.get_metadata_dict().get("Title")
+        if title:
+            metadata["title"] = title
+        return text_parts, metadata
+    finally:
+        pdf.close()
+
+
+def _pdf_pages_pdfplumber(pdfplumber: Any, filepath: str) -> Tuple[List[str], Dict[str, Any]]:
+    """Extract page texts + metadata with pdfplumber (page-parallel for long PDFs)."""
+    metadata = {}
+    with pdfplumber.open(filepath) as pdf:
+        num_pages = len(pdf.pages)
+        # Only fan out from the main process; inside ingest's file-level pool
+        # the cores are already busy with other files
+        if num_pages >= PDF_PARALLEL_MIN_PAGES and multiprocessing.parent_process() is None:
+            text_parts = _extract_pdf_pages_parallel(filepath, num_pages)
+        else:
+            text_parts = [""] * num_pages
+            for i, page in enumerate(pdf.pages):
+                text = page.extract_text()
+                if text:
+                    text_parts[i] = text
+        if pdf.metadata and pdf.metadata.get("Title"):
+            metadata["title"] = pdf.metadata["Title"]
+    return text_parts, metadata
+
+
+def _pdf_pages_pypdf2(PyPDF2: Any, filepath: str) -> Tuple[List[str], Dict[str, Any]]:
+    """Extract page texts + metadata with PyPDF2."""
+    metadata = {}
+    with open(filepath, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        text_parts = [""] * len(pdf_reader.pages)
+        for i, page in enumerate(pdf_reader.pages):
+            text = page.extract_text()
+            if text:
+                text_parts[i] = text
+        if pdf_reader.metadata and pdf_reader.metadata.get("/Title"):
+            metadata["title"] = pdf_reader.metadata["/Title"]
+    return text_parts, metadata
+
+
+# PDF backends in order of preference: (module name, extractor)
+_PDF_BACKENDS = (
+    ("pypdfium2", _pdf_pages_pdfium),
+    ("pdfplumber", _pdf_pages_pdfplumber),
+    ("PyPDF2", _pdf_pages_pypdf2),
+)
+_pdf_backend: Optional[Tuple[Any, Any]] = None
+
+
+def _get_pdf_backend() -> Tuple[Any, Any]:
+    """Resolve the first importable PDF backend once per process: (module, extractor)."""
+    global _pdf_backend
+    if _pdf_backend is None:
+        for name, extract in _PDF_BACKENDS:
+            try:
+                _pdf_backend = (importlib.import_module(name), extract)
+                break
+            except ImportError:
+                continue
+        else:
+            raise ImportError(
+                "PDF support requires 'pypdfium2', 'pdfplumber' or 'PyPDF2'. "
+                "Install with: pip install pypdfium2"
+            )
+    return _pdf_backend
+
+
 def normalize_pdf(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Normalize PDF file to text.
-    Requires: pip install pdfplumber or PyPDF2
+    Requires: pip install pypdfium2 (fastest), pdfplumber or PyPDF2
     
     Returns: (normalized_text, metadata_dict)
     """
-    text_parts = []
-    metadata = {}
-    
-    # Try pdfplumber first (better text extraction)
-    try:
-        import pdfplumber
-        with pdfplumber.open(filepath) as pdf:
-            for page in pdf.pages:
-                text_parts.append(page.extract_text() or "")
-            if pdf.metadata and pdf.metadata.get("Title"):
-                metadata["title"] = pdf.metadata["Title"]
-    except ImportError:
-        # Fallback to PyPDF2
-        try:
-            import PyPDF2
-            with open(filepath, "rb") as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                for page in pdf_reader.pages:
-                    text_parts.append(page.extract_text() or "")
-                if pdf_reader.metadata and pdf_reader.metadata.get("/Title"):
-                    metadata["title"] = pdf_reader.metadata["/Title"]
-        except ImportError:
-            raise ImportError(
-                "PDF support requires either 'pdfplumber' or 'PyPDF2'. "
-                "Install with: pip install pdfplumber"
-            )
+    module, extract = _get_pdf_backend()
+    text_parts, metadata = extract(module, filepath)
     
-    text = "\n\n".join(text_parts)
+    # Empty pages (scans, blanks) are left out rather than joined as runs of blank lines
+    text = "\n\n".join(part for part in text_parts if part)
     return text, metadata if metadata else None
 
 
-def normalize_document(filepath: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+def normalize_document(filepath: str, trust_canonical_json: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
     """
     Normalize document based on file type.
     Returns: (normalized_text, metadata_dict)
     """
     file_type = detect_file_type(filepath)
-    
-    if file_type == "json":
-        return normalize_json(filepath)
-    elif file_type == "md":
-        return normalize_markdown(filepath)
-    elif file_type == "txt":
-        return normalize_text(filepath)
-    elif file_type == "pdf":
-        return normalize_pdf(filepath)
-    else:
+    if file_type == "json" and trust_canonical_json:
+        return normalize_json(filepath, trust_canonical=True)
+    normalizer = _NORMALIZERS.get(file_type)
+    if normalizer is None:
         raise ValueError(f"Unsupported file type: {file_type} ({filepath})")
+    return normalizer(filepath)
+
+
+# File type -> normalizer (defined after the functions it references)
+_NORMALIZERS = {
+    "json": normalize_json,
+    "md": normalize_markdown,
+    "txt": normalize_text,
+    "pdf": normalize_pdf,
+}
@@ -1,61 +1,121 @@
-"""State management for incremental ingestion."""
+"""State management for incremental ingestion (SQLite-backed)."""
 
 import json
 import os
-from typing import Dict, Optional
+import sqlite3
+from typing import Callable, NamedTuple, Optional
 
 
+STATE_DB = "state.db"
+# Legacy JSON state; imported once into STATE_DB if present
 STATE_FILE = "state.json"
 
 
-def load_state() -> Dict[str, Dict[str, str]]:
-    """Load ingestion state from state.json."""
+class FileState(NamedTuple):
+    """Stored state of one ingested file (a row of the state table)."""
+    content_hash: str
+    mtime: str
+    size: Optional[int]
+    mtime_ns: Optional[int]
+
+
+def load_state() -> sqlite3.Connection:
+    """
+    Open the ingestion state store (state.db, WAL mode).
+    Lookups are per-file SELECTs, so nothing is loaded up front.
+    """
+    conn = sqlite3.connect(STATE_DB)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: commits stay atomic, fsync only at checkpoints
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS state ("
+        "path TEXT PRIMARY KEY, content_hash TEXT, mtime TEXT, size INTEGER, mtime_ns INTEGER)"
+    )
+    # state.db files from before mtime_ns; their rows take the hash path once
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(state)")}
+    if "mtime_ns" not in columns:
+        conn.execute("ALTER TABLE state ADD COLUMN mtime_ns INTEGER")
+    _import_legacy_state(conn)
+    return conn
+
+
+def _import_legacy_state(conn: sqlite3.Connection) -> None:
+    """Copy entries from an old state.json into an empty state table."""
     if not os.path.exists(STATE_FILE):
-        return {}
-    
+        return
+    if conn.execute("SELECT 1 FROM state LIMIT 1").fetchone() is not None:
+        return
+
     try:
         with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            legacy = json.load(f)
     except Exception:
-        return {}
+        return
 
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO state (path, content_hash, mtime, size) VALUES (?, ?, ?, ?)",
+            [
+                (path, entry.get("content_hash"), entry.get("mtime"), entry.get("size"))
+                for path, entry in legacy.items()
+                if isinstance(entry, dict)
+            ],
+        )
 
-def save_state(state: Dict[str, Dict[str, str]]) -> None:
-    """Save ingestion state to state.json."""
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2, ensure_ascii=False)
 
+def save_state(state: sqlite3.Connection) -> None:
+    """
+    Commit this run's state updates (one atomic transaction per ingest run).
+    No-op when nothing was updated.
+    """
+    if state.in_transaction:
+        state.commit()
 
-def get_file_state(filepath: str, state: Dict[str, Dict[str, str]]) -> Optional[Dict[str, str]]:
+
+def get_file_state(filepath: str, state: sqlite3.Connection) -> Optional[FileState]:
     """Get state for a specific file."""
-    return state.get(filepath)
+    row = state.execute(
+        "SELECT content_hash, mtime, size, mtime_ns FROM state WHERE path = ?", (filepath,)
+    ).fetchone()
+    return FileState._make(row) if row is not None else None
 
 
 def update_file_state(
     filepath: str,
     content_hash: str,
     mtime: str,
-    state: Dict[str, Dict[str, str]],
+    state: sqlite3.Connection,
+    size: Optional[int] = None,
+    mtime_ns: Optional[int] = None,
 ) -> None:
-    """Update state for a specific file."""
-    state[filepath] = {
-        "content_hash": content_hash,
-        "mtime": mtime,
-    }
+    """Update state for a specific file (persisted by save_state)."""
+    state.execute(
+        "INSERT OR REPLACE INTO state (path, content_hash, mtime, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+        (filepath, content_hash, mtime, size, mtime_ns),
+    )
 
 
 def should_skip_file(
     filepath: str,
-    current_hash: str,
-    current_mtime: str,
-    state: Dict[str, Dict[str, str]],
+    current_mtime_ns: int,
+    current_size: int,
+    state: sqlite3.Connection,
+    hash_fn: Optional[Callable[[], str]] = None,
 ) -> bool:
-    """Check if file should be skipped (unchanged since last ingest)."""
+    """
+    Check if file should be skipped (unchanged since last ingest).
+    Same mtime (st_mtime_ns; the ISO mtime is only second-precise, so a same-size
+    rewrite within the recorded second would match it) and size is authoritative and
+    never hashes the file. Otherwise, if hash_fn is given, the file is hashed (lazily)
+    and compared to the stored hash.
+    """
     file_state = get_file_state(filepath, state)
     if file_state is None:
         return False
-    
-    return (
-        file_state.get("content_hash") == current_hash
-        and file_state.get("mtime") == current_mtime
-    )
+
+    if file_state.mtime_ns == current_mtime_ns and file_state.size == current_size:
+        return True
+    if hash_fn is None:
+        return False
+    return file_state.content_hash == hash_fn()
@@ -2,33 +2,137 @@
 
 import hashlib
 import json
+import multiprocessing
 import os
+import re
 import time
-from typing import Any
+from typing import Any, Optional, Tuple
+
+import blake3
+import orjson
+
+_CANONICAL_JSON = orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
 
 
 def stable_json_text(obj: Any) -> str:
-    """Stable deterministic JSON -> text for embedding + BM25."""
-    return json.dumps(obj, ensure_ascii=False, sort_keys=True, indent=2)
+    """Stable deterministic JSON -> text for embedding + BM25 (sorted keys, 2-space indent)."""
+    return stable_json_bytes(obj).decode("utf-8")
+
+
+def stable_json_bytes(obj: Any) -> bytes:
+    """
+    Canonical JSON as UTF-8 bytes (orjson, C); hash these directly instead of text.encode().
+    Integers beyond 64 bits, which orjson can't serialize, go through stdlib json.
+    """
+    try:
+        return orjson.dumps(obj, option=_CANONICAL_JSON)
+    except orjson.JSONEncodeError:
+        return json.dumps(obj, ensure_ascii=False, sort_keys=True, indent=2).encode("utf-8")
+
+
+# A run of 19+ digits may be an integer outside 64 bits, which orjson silently
+# parses as a float. Such documents (rare; long digit strings also match) use stdlib json.
+_LONG_DIGITS_RE = re.compile(rb"\d{19}")
+
+
+def _parse_json(raw: bytes) -> Tuple[Any, bool]:
+    """
+    Parse JSON bytes with orjson, or with stdlib json for what orjson would round
+    (big integers) or rejects (NaN, Infinity, 1e400). Returns (obj, parsed_by_orjson).
+    """
+    if not _LONG_DIGITS_RE.search(raw):
+        try:
+            return orjson.loads(raw), True
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw), False
+
+
+def load_json_bytes(raw: bytes) -> Any:
+    """Parse JSON bytes (orjson, stdlib json fallback; see _parse_json)."""
+    return _parse_json(raw)[0]
+
+
+def load_json_canonical(raw: bytes) -> Tuple[Any, str]:
+    """
+    Parse JSON bytes and return (obj, stable_json_text form). Documents that needed
+    stdlib json are also serialized by it, so NaN/Infinity stay as written instead
+    of becoming orjson's null.
+    """
+    obj, parsed_by_orjson = _parse_json(raw)
+    if parsed_by_orjson:
+        return obj, stable_json_text(obj)
+    return obj, json.dumps(obj, ensure_ascii=False, sort_keys=True, indent=2)
+
+
+def process_pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for ProcessPoolExecutors. By the time pools start, the process runs
+    threads (pymongo monitors, HTTP clients), and fork()ing a threaded process can
+    deadlock the children; workers come from a forkserver instead (spawn if unavailable).
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
 
 
 def sha256_text(s: str) -> str:
-    """Compute SHA256 hash of text."""
+    """
+    Compute SHA256 hash of text.
+    hashlib delegates to OpenSSL, which uses SHA-NI on x86_64 CPUs that have it
+    (check `python -c "import ssl; print(ssl.OPENSSL_VERSION)"` reports OpenSSL 3).
+    """
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+def sha256_file(filepath: str) -> str:
+    """Compute SHA256 hash of the raw file bytes, streamed (no full read into memory)."""
+    with open(filepath, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _iso_utc(ts: Optional[float] = None) -> str:
+    """UTC timestamp as YYYY-MM-DDTHH:MM:SSZ (f-string; no strftime format parsing)."""
+    g = time.gmtime(ts)
+    return f"{g.tm_year:04d}-{g.tm_mon:02d}-{g.tm_mday:02d}T{g.tm_hour:02d}:{g.tm_min:02d}:{g.tm_sec:02d}Z"
+
+
 def now_iso() -> str:
     """Get current UTC time in ISO format."""
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return _iso_utc()
 
 
 def get_file_mtime(filepath: str) -> str:
     """Get file modification time in ISO format."""
-    mtime = os.path.getmtime(filepath)
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime))
+    return file_stat_iso(os.stat(filepath))[0]
+
+
+def file_stat_iso(st: os.stat_result) -> Tuple[str, int]:
+    """(mtime in ISO format, size) from one stat result, so callers stat each file once."""
+    return _iso_utc(st.st_mtime), st.st_size
+
+
+def stable_id_prefix(source_id: str) -> "blake3.blake3":
+    """Hasher primed with "{source_id}::"; copy() it per chunk instead of re-hashing the prefix."""
+    h = blake3.blake3()
+    h.update(source_id.encode("utf-8"))
+    h.update(b"::")
+    return h
 
 
-def compute_stable_id(source_id: str, chunk_id: str, content_hash: str) -> str:
-    """Compute stable _id for MongoDB document."""
-    combined = f"{source_id}::{chunk_id}::{content_hash}"
-    return sha256_text(combined)
+def compute_stable_id(
+    source_id: str,
+    chunk_id: str,
+    content_hash: str,
+    prefix: Optional["blake3.blake3"] = None,
+) -> str:
+    """
+    Compute stable _id for MongoDB document.
+    Non-cryptographic dedupe key, so BLAKE3 (SIMD) instead of SHA-256; fields are
+    fed separately to skip building the combined string. Pass prefix (from
+    stable_id_prefix(source_id)) when computing many ids for one source.
+    """
+    h = (prefix if prefix is not None else stable_id_prefix(source_id)).copy()
+    h.update(chunk_id.encode("utf-8"))
+    h.update(b"::")
+    h.update(bytes.fromhex(content_hash))
+    return h.hexdigest()